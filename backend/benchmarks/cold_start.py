@@ -0,0 +1,123 @@
+"""
+Cold start benchmark: time from spawning the server to its first answered request.
+
+Usage (from the backend directory):
+    python benchmarks/cold_start.py                  # check against the budget
+    python benchmarks/cold_start.py --record current # update cold_start_results.json
+
+Each run starts a fresh `uvicorn main:app` process and polls --path until it
+returns 200. It also times a bare `import main` in a separate interpreter.
+Exits with status 1 when the median first-request time exceeds the budget
+stored in cold_start_results.json (override with --budget-ms or
+COLD_START_BUDGET_MS). --app-dir benchmarks another checkout of the backend,
+which is how the baseline figures were taken.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(BACKEND_DIR, "benchmarks", "cold_start_results.json")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import_ms(app_dir):
+    code = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=app_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_request_ms(app_dir, path, timeout_s=30.0):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout_s:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited early with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError(f"no response from {url} within {timeout_s}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def load_results():
+    with open(RESULTS_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/healthz")
+    parser.add_argument("--app-dir", default=BACKEND_DIR)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument(
+        "--record",
+        metavar="NAME",
+        help="store this run under NAME in cold_start_results.json",
+    )
+    args = parser.parse_args(argv)
+
+    import_ms = [measure_import_ms(args.app_dir) for _ in range(args.runs)]
+    first_request_ms = [
+        measure_first_request_ms(args.app_dir, args.path) for _ in range(args.runs)
+    ]
+    result = {
+        "runs": args.runs,
+        "path": args.path,
+        "import_ms_median": round(statistics.median(import_ms), 2),
+        "first_request_ms_median": round(statistics.median(first_request_ms), 2),
+        "first_request_ms_max": round(max(first_request_ms), 2),
+        "python": platform.python_version(),
+    }
+
+    results = load_results()
+    if args.record:
+        results[args.record] = result
+        with open(RESULTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    budget_ms = args.budget_ms
+    if budget_ms is None:
+        budget_ms = float(os.getenv("COLD_START_BUDGET_MS", results["budget_ms"]))
+    result["budget_ms"] = budget_ms
+    result["within_budget"] = result["first_request_ms_median"] <= budget_ms
+    print(json.dumps(result, indent=2))
+    return 0 if result["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+import bisect
+import math
+import sys
+import threading
+from array import array
+
+from sqlalchemy import bindparam, text
+
+# Columns loaded from the books table, in snapshot order.
+BOOK_COLUMNS = (
+    "id",
+    "title",
+    "author",
+    "price",
+    "current_bid",
+    "starting_bid",
+    "bid_increment",
+    "description",
+    "cover_image",
+    "owner_id",
+)
+FLOAT_COLUMNS = ("price", "current_bid", "starting_bid", "bid_increment")
+# Per-book strings; authors are interned and accounted for separately.
+TEXT_COLUMNS = ("title", "description", "cover_image")
+
+_SNAPSHOT_SQL = text(f"SELECT {', '.join(BOOK_COLUMNS)} FROM books ORDER BY id")
+_BOOKS_BY_ID_SQL = text(
+    f"SELECT {', '.join(BOOK_COLUMNS)} FROM books WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+_CHANGE_RANGE_SQL = text("SELECT MIN(id), MAX(id) FROM book_changes")
+_CHANGES_SQL = text("SELECT id, book_id FROM book_changes WHERE id > :seq ORDER BY id")
+
+# Sentinels stored in the typed arrays for NULLs, so catalogue reads return the
+# same None the database path would. Database ids are always positive.
+_NO_FLOAT = float("nan")
+_NO_ID = -1
+
+# Catalogue states. Only LOADED serves reads; DISABLED means reads fall back to
+# the database until a successful reload.
+LOADING = "loading"
+LOADED = "loaded"
+DISABLED = "disabled"
+
+# Approximate bytes one row adds on top of its strings: an 8-byte slot in each
+# typed array or an 8-byte pointer in each string list.
+_ROW_BYTES = 8 * len(BOOK_COLUMNS)
+
+
+class BookRecord:
+    """
+    Lightweight read-only view of one catalogue row.
+    Exposes the same attributes as models.Book so schemas.Book can validate it.
+    """
+
+    __slots__ = BOOK_COLUMNS
+
+    def __init__(self, *values):
+        for name, value in zip(BOOK_COLUMNS, values):
+            setattr(self, name, value)
+
+
+class CatalogueFull(Exception):
+    """Raised when a snapshot or insert would exceed the configured book limit."""
+
+
+def _bid_of(row):
+    # current_bid is the only field updated after creation, and crud.update_book_bid
+    # only ever raises it, so it orders competing updates for the same book.
+    # NULL sorts first.
+    bid = row[BOOK_COLUMNS.index("current_bid")]
+    return -math.inf if bid is None else bid
+
+
+class HotCatalogue:
+    """
+    In-process, columnar copy of the books table for read-heavy endpoints.
+
+    Numeric fields live in typed arrays, authors are interned (they repeat a lot)
+    and the remaining strings are kept in plain lists. Rows are kept sorted by id
+    so lookups are a binary search over the id array.
+
+    Changes made in this process arrive through upsert(); changes made by other
+    workers are picked up by sync_changes(), which replays the book_changes log.
+    """
+
+    def __init__(self, max_books: int = 1_000_000):
+        self.max_books = max_books
+        self.state = DISABLED
+        # Set once the first snapshot attempt has finished, whatever its outcome.
+        self.initial_load_done = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._columns = self._empty_columns()
+        self._authors = set()
+        # Upserts received while a snapshot is being read, replayed after the swap.
+        self._pending = None
+        # Last book_changes id reflected in the catalogue.
+        self._seq = 0
+        self._overhead = sum(sys.getsizeof(c) for c in self._columns.values())
+        self._payload = 0
+        self._usage = self._usage_report()
+
+    @property
+    def ready(self):
+        return self.state == LOADED
+
+    def mark_loading(self):
+        """Flags a snapshot as pending before the loader thread gets to run."""
+        with self._lock:
+            if self.state != LOADED:
+                self.state = LOADING
+
+    @staticmethod
+    def _empty_columns():
+        return {
+            "id": array("q"),
+            "owner_id": array("q"),
+            "price": array("d"),
+            "current_bid": array("d"),
+            "starting_bid": array("d"),
+            "bid_increment": array("d"),
+            "title": [],
+            "author": [],
+            "description": [],
+            "cover_image": [],
+        }
+
+    @staticmethod
+    def _encode(row):
+        """Converts a DB row into the per-column values stored in the arrays."""
+        values = dict(zip(BOOK_COLUMNS, row))
+        for name in FLOAT_COLUMNS:
+            if values[name] is None:
+                values[name] = _NO_FLOAT
+        if values["owner_id"] is None:
+            values["owner_id"] = _NO_ID
+        if values["author"]:
+            values["author"] = sys.intern(values["author"])
+        return values
+
+    def _row_bytes(self, values, authors):
+        """Bytes a row adds; an author already in `authors` is not counted again."""
+        size = _ROW_BYTES
+        for name in TEXT_COLUMNS:
+            if values[name] is not None:
+                size += sys.getsizeof(values[name])
+        author = values["author"]
+        if author is not None and author not in authors:
+            authors.add(author)
+            size += sys.getsizeof(author)
+        return size
+
+    def _usage_report(self):
+        count, payload = len(self), self._payload
+        return {
+            "books": count,
+            "max_books": self.max_books,
+            "bytes": self._overhead + payload,
+            # Extrapolated from per-row bytes only; fixed container overhead
+            # would otherwise dominate small catalogues.
+            "bytes_per_million_books": int(payload / count * 1_000_000) if count else 0,
+        }
+
+    # --- Loading ---
+
+    def load_snapshot(self, engine):
+        """
+        Bulk-loads the whole books table with a single raw SELECT and swaps it in.
+        Rows are fetched into plain tuples first so the SQLite read transaction
+        ends before the columns are built. Upserts arriving meanwhile are buffered
+        and replayed on top of the new snapshot. A loaded catalogue keeps serving
+        the old snapshot during a reload; any failure leaves it DISABLED.
+        """
+        with self._load_lock:
+            return self._load_snapshot(engine)
+
+    def _load_snapshot(self, engine):
+        self.mark_loading()
+        with self._lock:
+            self._pending = {}
+        try:
+            with engine.connect() as conn:
+                # Read the log position first: changes racing the SELECT are
+                # replayed again by the next sync, which is harmless.
+                seq = conn.execute(_CHANGE_RANGE_SQL).one()[1] or 0
+                rows = conn.execute(_SNAPSHOT_SQL).fetchmany(self.max_books + 1)
+            if len(rows) > self.max_books:
+                raise CatalogueFull(
+                    f"Catalogue exceeds the limit of {self.max_books} books"
+                )
+            columns = self._empty_columns()
+            authors = set()
+            payload = 0
+            for row in rows:
+                values = self._encode(row)
+                for name in BOOK_COLUMNS:
+                    columns[name].append(values[name])
+                payload += self._row_bytes(values, authors)
+            del rows
+            with self._lock:
+                self._columns = columns
+                self._authors = authors
+                self._payload = payload
+                self._seq = seq
+                pending, self._pending = self._pending, None
+                for row in pending.values():
+                    self._apply(row)
+                self._usage = self._usage_report()
+                self.state = LOADED
+        except Exception:
+            self.state = DISABLED
+            raise
+        finally:
+            with self._lock:
+                self._pending = None
+            self.initial_load_done = True
+        return len(self)
+
+    def sync_changes(self, engine):
+        """
+        Applies books changed by any process since the last snapshot or sync, by
+        re-reading them from the book_changes log. Falls back to a full snapshot
+        when the log was pruned past our position or holds a reload request
+        (book_id NULL). A disabled catalogue only reacts to reload requests.
+        Returns the number of books refreshed.
+        """
+        with self._load_lock:
+            reload = False
+            rows = []
+            with engine.connect() as conn:
+                oldest, latest = conn.execute(_CHANGE_RANGE_SQL).one()
+                if latest is None or latest <= self._seq:
+                    return 0
+                changes = conn.execute(_CHANGES_SQL, {"seq": self._seq}).all()
+                book_ids = {book_id for _, book_id in changes}
+                if None in book_ids or (self.ready and oldest > self._seq + 1):
+                    reload = True
+                elif self.ready:
+                    rows = conn.execute(
+                        _BOOKS_BY_ID_SQL, {"ids": sorted(book_ids)}
+                    ).all()
+            if reload:
+                # Consume the request even if the load fails, so it is not retried
+                # on every poll; the snapshot records its own position on success.
+                self._seq = latest
+                return self._load_snapshot(engine)
+            if not self.ready:
+                return 0
+            with self._lock:
+                for row in rows:
+                    self._apply(tuple(row))
+                self._seq = changes[-1][0]
+            return len(rows)
+
+    # --- Change notifications ---
+
+    def upsert(self, book):
+        """
+        Applies a created or updated book (anything with models.Book attributes).
+        An update carrying a lower current_bid than the one held is ignored, so
+        concurrent bids notifying out of order cannot roll the catalogue back;
+        the database never lowers a bid either (see crud.update_book_bid).
+        """
+        row = tuple(getattr(book, name) for name in BOOK_COLUMNS)
+        with self._lock:
+            if self._pending is not None:
+                held = self._pending.get(book.id)
+                if held is None or _bid_of(row) >= _bid_of(held):
+                    self._pending[book.id] = row
+            self._apply(row)
+
+    def _apply(self, row):
+        # Caller holds self._lock.
+        values = self._encode(row)
+        columns = self._columns
+        ids = columns["id"]
+        book_id = values["id"]
+        pos = bisect.bisect_left(ids, book_id)
+        if pos < len(ids) and ids[pos] == book_id:
+            held = columns["current_bid"][pos]
+            if not math.isnan(held) and _bid_of(row) < held:
+                return
+            self._payload -= sum(
+                sys.getsizeof(columns[name][pos])
+                for name in TEXT_COLUMNS
+                if columns[name][pos] is not None
+            )
+            for name in BOOK_COLUMNS:
+                columns[name][pos] = values[name]
+            self._payload += self._row_bytes(values, self._authors) - _ROW_BYTES
+            self._usage = self._usage_report()
+            return
+        if len(ids) >= self.max_books:
+            # Stop serving a partial catalogue; callers fall back to the DB.
+            self.state = DISABLED
+            raise CatalogueFull(
+                f"Catalogue exceeds the limit of {self.max_books} books"
+            )
+        for name in BOOK_COLUMNS:
+            columns[name].insert(pos, values[name])
+        self._payload += self._row_bytes(values, self._authors)
+        self._usage = self._usage_report()
+
+    # --- Reads ---
+
+    def _record(self, columns, pos):
+        values = [columns[name][pos] for name in BOOK_COLUMNS]
+        for i, name in enumerate(BOOK_COLUMNS):
+            if name in FLOAT_COLUMNS and math.isnan(values[i]):
+                values[i] = None
+            elif name == "owner_id" and values[i] == _NO_ID:
+                values[i] = None
+        return BookRecord(*values)
+
+    def get_book(self, book_id: int):
+        """Same contract as crud.get_book: a record or None."""
+        with self._lock:
+            columns = self._columns
+            ids = columns["id"]
+            pos = bisect.bisect_left(ids, book_id)
+            if pos < len(ids) and ids[pos] == book_id:
+                return self._record(columns, pos)
+        return None
+
+    def get_books(self, skip: int = 0, limit: int = 100):
+        """Same contract as crud.get_books, in id order."""
+        with self._lock:
+            columns = self._columns
+            end = min(len(columns["id"]), max(skip, 0) + max(limit, 0))
+            return [self._record(columns, pos) for pos in range(max(skip, 0), end)]
+
+    def __len__(self):
+        return len(self._columns["id"])
+
+    # --- Memory accounting ---
+
+    def memory_usage(self):
+        """
+        Returns the approximate bytes held by the catalogue and the same figure
+        extrapolated to one million books. Interned authors are counted once.
+        The figure is computed per snapshot and kept current by upserts, so this
+        never walks the catalogue or takes the lock.
+        """
+        return dict(self._usage)
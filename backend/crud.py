@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 import models, schemas, security
 
@@ -27,6 +28,25 @@ def create_user(db: Session, user: schemas.UserCreate):
 
 # --- Book CRUD ---
 
+# Callbacks invoked with the committed models.Book whenever a book is created or
+# updated. Used to keep in-process caches (e.g. catalog.HotCatalogue) current.
+book_change_listeners = []
+
+def notify_book_changed(db_book):
+    """
+    Passes a freshly committed book to every registered change listener.
+    """
+    for listener in book_change_listeners:
+        listener(db_book)
+
+def record_book_change(db: Session, book_id):
+    """
+    Appends to the book_changes log in the caller's transaction, so other
+    workers' catalogues see the change once it commits. book_id None requests
+    a full catalogue reload.
+    """
+    db.add(models.BookChange(book_id=book_id))
+
 def get_book(db: Session, book_id: int):
     """
     Fetches a single book from the database by its ID.
@@ -45,6 +65,31 @@ def create_book(db: Session, book: schemas.BookCreate, owner_id: int):
     """
     db_book = models.Book(**book.dict(), owner_id=owner_id)
     db.add(db_book)
+    db.flush()
+    record_book_change(db, db_book.id)
     db.commit()
     db.refresh(db_book)
+    notify_book_changed(db_book)
     return db_book
+
+def update_book_bid(db: Session, book: models.Book, expected_bid: float, amount: float):
+    """
+    Sets a book's current bid only if it still equals expected_bid, the value the
+    bid was validated against. Returns False if another bid got there first.
+    The book is refreshed from the committed row on success.
+    """
+    updated = (
+        db.query(models.Book)
+        .filter(
+            models.Book.id == book.id,
+            func.coalesce(models.Book.current_bid, 0.0) == expected_bid,
+        )
+        .update({models.Book.current_bid: amount}, synchronize_session=False)
+    )
+    if not updated:
+        db.rollback()
+        return False
+    record_book_change(db, book.id)
+    db.commit()
+    db.refresh(book)
+    return True
@@ -0,0 +1,101 @@
+import json
+import logging
+from collections import deque
+from functools import lru_cache
+
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+
+import metrics
+
+router = APIRouter(tags=["Dashboard"])
+
+# -------------------------------
+# Dashboard Global State
+# -------------------------------
+DASHBOARD_STATE = {
+    "total_requests": 0,
+    "total_errors": 0,
+    "latest_latency_ms": 0,
+    "logs": deque(maxlen=20),
+}
+
+
+# -------------------------------
+# Custom Log Handler for Dashboard
+# -------------------------------
+class DashboardLogHandler(logging.Handler):
+    def emit(self, record):
+        try:
+            log_entry = self.format(record)
+            log_obj = json.loads(log_entry)
+            simple_log = {
+                "type": log_obj.get("level", "INFO"),
+                "time": log_obj.get("timestamp", "").split("T")[-1].split(".")[0],
+                "msg": log_obj.get("message", ""),
+            }
+            DASHBOARD_STATE["logs"].appendleft(simple_log)
+        except Exception:
+            self.handleError(record)
+
+
+# -------------------------------
+# 設定 Templates (Dashboard 前端)
+# -------------------------------
+@lru_cache(maxsize=None)
+def get_templates():
+    # Jinja2 is only loaded the first time the dashboard page is requested.
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory="templates")
+
+
+@router.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    return get_templates().TemplateResponse("index.html", {"request": request})
+
+
+@router.get("/api/dashboard-stats")
+async def dashboard_stats():
+    # CPU usage comes from the metrics sampler; it is None when metrics are off.
+    collectors = metrics.get()
+    cpu = collectors.CPU_USAGE._value.get() if collectors else None
+    total = DASHBOARD_STATE["total_requests"]
+    errors = DASHBOARD_STATE["total_errors"]
+    availability = ((total - errors) / total) * 100 if total > 0 else 100.0
+    latency = DASHBOARD_STATE["latest_latency_ms"]
+    alerts = []
+    if cpu is not None and cpu > 85:
+        alerts.append(
+            {
+                "level": "WARNING",
+                "title": f"CPU High ({cpu}%)",
+                "component": "Hosting Node",
+            }
+        )
+    if latency > 500:
+        alerts.append(
+            {"level": "CRITICAL", "title": "High Latency", "component": "API Gateway"}
+        )
+    if errors > 0 and (errors / total) > 0.05:
+        alerts.append(
+            {
+                "level": "CRITICAL",
+                "title": "Error Rate > 5%",
+                "component": "Auth/Bid Service",
+            }
+        )
+    return JSONResponse(
+        {
+            "metrics": {
+                "availability": round(availability, 2),
+                "errorBudgetUsed": min(errors * 10, 100),
+                "p95Latency": int(latency),
+                "p95Threshold": 200,
+                "cpuUsage": cpu,
+                "cpuThreshold": 90,
+            },
+            "logs": list(DASHBOARD_STATE["logs"]),
+            "alerts": alerts,
+        }
+    )
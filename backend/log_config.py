@@ -0,0 +1,60 @@
+import datetime
+import logging
+import os
+from contextvars import ContextVar
+
+# -------------------------------
+# Context for trace_id
+# -------------------------------
+trace_id_var = ContextVar("trace_id", default=None)
+
+logger = logging.getLogger("bookswap-app")
+# Shared by every handler attached through configure_logging().
+_formatter = None
+
+
+def configure_logging(*extra_handlers):
+    """
+    Attaches the JSON console handler (plus any extra handlers) to the app logger.
+    python-json-logger is imported here rather than at module level so it is only
+    loaded once the server (or a CLI command) actually starts.
+    Later calls in the same process reuse the console handler and formatter and
+    only attach extra handlers of a type not already present, e.g. the dashboard
+    handler when a CLI command configured logging first.
+    """
+    global _formatter
+    handlers = extra_handlers
+    if _formatter is None:
+        _formatter = _build_formatter()
+        logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        logger.propagate = False
+        handlers = (logging.StreamHandler(), *extra_handlers)
+    attached = {type(handler) for handler in logger.handlers}
+    for handler in handlers:
+        if type(handler) in attached:
+            continue
+        handler.setFormatter(_formatter)
+        logger.addHandler(handler)
+        attached.add(type(handler))
+    return logger
+
+
+def _build_formatter():
+    from pythonjsonlogger import jsonlogger
+
+    class CustomJsonFormatter(jsonlogger.JsonFormatter):
+        def add_fields(self, log_record, record, message_dict):
+            super().add_fields(log_record, record, message_dict)
+            if not log_record.get("timestamp"):
+                log_record["timestamp"] = datetime.datetime.utcfromtimestamp(
+                    record.created
+                ).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            if not log_record.get("level"):
+                log_record["level"] = record.levelname.upper()
+            else:
+                log_record["level"] = log_record["level"].upper()
+            trace_id = trace_id_var.get()
+            if trace_id:
+                log_record["trace_id"] = trace_id
+
+    return CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s")
@@ -1,136 +1,150 @@
-import logging
+import time
+
+# Taken before any other import so the first-request log covers import time too.
+IMPORT_STARTED = time.perf_counter()
+
+import functools
 import json
 import uuid
 import datetime
 import os
 import threading
-from collections import deque
-from contextvars import ContextVar
+from contextlib import asynccontextmanager
 from typing import List
 
-import psutil
-from fastapi import FastAPI, Request, Response, HTTPException, Depends, status
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, Request, Response, HTTPException, Depends, Query, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import Histogram, Counter, Gauge, make_asgi_app
-from pythonjsonlogger import jsonlogger
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 # Import database modules
 import models, schemas, crud, security
+import dashboard
+import metrics
+from catalog import HotCatalogue, CatalogueFull
 from database import SessionLocal, engine, get_db
+from log_config import configure_logging, logger, trace_id_var
 
-
-# --- Database Initialization ---
-# Create all database tables based on the models
-models.Base.metadata.create_all(bind=engine)
+# Heavy optional subsystems are imported lazily:
+#   - metrics.collectors (prometheus_client, psutil): via metrics.get(), on first
+#     use or by the CPU sampler thread
+#   - dashboard templates (Jinja2): on the first dashboard page request
+#   - python-json-logger: when the lifespan configures logging
+# Schema creation and seeding live in `python manage.py init-db`.
 
 # -------------------------------
-# 1. 設定 Templates (Dashboard 前端)
+# Feature Toggles & Constants
 # -------------------------------
-templates = Jinja2Templates(directory="templates")
+ONE_CLICK_BID_ENABLED = os.getenv("ONE_CLICK_BID_ENABLED", "true").lower() == "true"
+LATENCY_THRESHOLD_MS = 500
+HOT_CATALOG_ENABLED = os.getenv("HOT_CATALOG_ENABLED", "false").lower() == "true"
+HOT_CATALOG_MAX_BOOKS = int(os.getenv("HOT_CATALOG_MAX_BOOKS", "1000000"))
+HOT_CATALOG_SYNC_SECONDS = float(os.getenv("HOT_CATALOG_SYNC_SECONDS", "5"))
 
-# -------------------------------
-# Context for trace_id
-# -------------------------------
-trace_id_var = ContextVar("trace_id", default=None)
+STARTUP_TIMINGS = {"import_ms": None, "first_request_ms": None}
 
 # -------------------------------
-# Dashboard Global State
+# Hot Catalogue (optional in-memory book store)
 # -------------------------------
-DASHBOARD_STATE = {
-    "total_requests": 0,
-    "total_errors": 0,
-    "latest_latency_ms": 0,
-    "logs": deque(maxlen=20),
-}
-
+hot_catalog = HotCatalogue(max_books=HOT_CATALOG_MAX_BOOKS)
 
-# -------------------------------
-# Custom Log Handler for Dashboard
-# -------------------------------
-class DashboardLogHandler(logging.Handler):
-    def emit(self, record):
-        try:
-            log_entry = self.format(record)
-            log_obj = json.loads(log_entry)
-            simple_log = {
-                "type": log_obj.get("level", "INFO"),
-                "time": log_obj.get("timestamp", "").split("T")[-1].split(".")[0],
-                "msg": log_obj.get("message", ""),
-            }
-            DASHBOARD_STATE["logs"].appendleft(simple_log)
-        except Exception:
-            self.handleError(record)
-
-
-# -------------------------------
-# Custom JSON Formatter
-# -------------------------------
-class CustomJsonFormatter(jsonlogger.JsonFormatter):
-    def add_fields(self, log_record, record, message_dict):
-        super().add_fields(log_record, record, message_dict)
-        if not log_record.get("timestamp"):
-            log_record["timestamp"] = datetime.datetime.utcfromtimestamp(
-                record.created
-            ).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-        if not log_record.get("level"):
-            log_record["level"] = record.levelname.upper()
-        else:
-            log_record["level"] = log_record["level"].upper()
-        trace_id = trace_id_var.get()
-        if trace_id:
-            log_record["trace_id"] = trace_id
 
+def sync_hot_catalog(db_book):
+    # Runs after the DB commit: a catalogue failure must never fail the request.
+    try:
+        hot_catalog.upsert(db_book)
+    except CatalogueFull as e:
+        logger.warning(
+            "Hot catalogue disabled, falling back to database reads",
+            extra={"props": {"reason": str(e)}},
+        )
+    except Exception as e:
+        logger.error(
+            f"Failed to update hot catalogue for book {db_book.id}",
+            extra={"props": {"book_id": db_book.id, "error": str(e)}},
+        )
 
-# -------------------------------
-# Configure Logger
-# -------------------------------
-logger = logging.getLogger("bookswap-app")
-logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
-console_handler = logging.StreamHandler()
-formatter = CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s")
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-dashboard_handler = DashboardLogHandler()
-dashboard_handler.setFormatter(formatter)
-logger.addHandler(dashboard_handler)
-logger.propagate = False
 
-# -------------------------------
-# Prometheus Metrics
-# -------------------------------
-BID_LATENCY = Histogram(
-    "bookswap_bid_latency_seconds", "Latency of the bid flow in seconds"
-)
-LOGIN_ERRORS = Counter(
-    "bookswap_login_errors_total", "Total number of login errors", ["error_code"]
-)
-CPU_USAGE = Gauge(
-    "bookswap_cpu_usage_percent", "Current CPU usage of the application host"
-)
+def run_cpu_sampler():
+    metrics.get().update_cpu_usage()
 
 
-def update_cpu_usage():
+def load_hot_catalog():
+    # Runs on a background thread so /healthz answers while the snapshot loads.
+    try:
+        hot_catalog.load_snapshot(engine)
+    except (CatalogueFull, SQLAlchemyError) as e:
+        logger.warning(
+            "Hot catalogue disabled, falling back to database reads",
+            extra={"props": {"reason": str(e)}},
+        )
+        return
+    usage = hot_catalog.memory_usage()
+    collectors = metrics.get()
+    if collectors:
+        collectors.CATALOG_BYTES.set(usage["bytes"])
+    logger.info("Hot catalogue loaded", extra={"props": usage})
+
+
+def run_hot_catalog():
+    # Loads the snapshot, then polls the book_changes log so writes made by other
+    # workers or pods reach this process within HOT_CATALOG_SYNC_SECONDS.
+    load_hot_catalog()
     while True:
-        CPU_USAGE.set(psutil.cpu_percent(interval=1))
-
+        time.sleep(HOT_CATALOG_SYNC_SECONDS)
+        try:
+            refreshed = hot_catalog.sync_changes(engine)
+        except (CatalogueFull, SQLAlchemyError) as e:
+            logger.warning(
+                "Hot catalogue sync failed, falling back to database reads",
+                extra={"props": {"reason": str(e)}},
+            )
+            continue
+        if refreshed:
+            logger.info(
+                "Hot catalogue synced",
+                extra={"props": {"books": refreshed, "state": hot_catalog.state}},
+            )
 
-cpu_thread = threading.Thread(target=update_cpu_usage, daemon=True)
-cpu_thread.start()
 
 # -------------------------------
-# Feature Toggles & Constants
+# Lifespan
 # -------------------------------
-ONE_CLICK_BID_ENABLED = os.getenv("ONE_CLICK_BID_ENABLED", "true").lower() == "true"
-LATENCY_THRESHOLD_MS = 500
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging(dashboard.DashboardLogHandler())
+    if metrics.ENABLED:
+        # The sampler thread does the metrics import itself, off the startup path.
+        threading.Thread(target=run_cpu_sampler, daemon=True).start()
+    if HOT_CATALOG_ENABLED:
+        crud.book_change_listeners.append(sync_hot_catalog)
+        # Marked before the thread starts so /readyz never sees a gap.
+        hot_catalog.mark_loading()
+        threading.Thread(target=run_hot_catalog, daemon=True).start()
+
+    logger.info(
+        "Starting BookSwap backend",
+        extra={
+            "props": {
+                "one_click_bid_enabled": ONE_CLICK_BID_ENABLED,
+                "hot_catalog_enabled": HOT_CATALOG_ENABLED,
+                "metrics_enabled": metrics.ENABLED,
+                "import_ms": STARTUP_TIMINGS["import_ms"],
+            }
+        },
+    )
+    yield
+    if sync_hot_catalog in crud.book_change_listeners:
+        crud.book_change_listeners.remove(sync_hot_catalog)
+
 
 # -------------------------------
 # FastAPI App
 # -------------------------------
-app = FastAPI(title="BookSwap Backend")
+app = FastAPI(title="BookSwap Backend", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -180,68 +194,6 @@ async def get_current_seller_simple(
     return current_user
 
 
-# --- Database Seeding on Startup ---
-@app.on_event("startup")
-async def startup_event():
-    db = SessionLocal()
-    if db.query(models.User).count() == 0:
-        logger.info("Database is empty. Seeding initial users and books...")
-        # Create default users
-        seller = crud.create_user(
-            db,
-            schemas.UserCreate(
-                username="seller",
-                email="seller@example.com",
-                password="password",
-                role="seller",
-            ),
-        )
-        buyer = crud.create_user(
-            db,
-            schemas.UserCreate(
-                username="buyer",
-                email="buyer@example.com",
-                password="password",
-                role="buyer",
-            ),
-        )
-
-        # Create default books
-        seed_books = [
-            {
-                "title": "富爸爸，窮爸爸【25週年紀念版】",
-                "author": "羅勃特．T．清崎",
-                "price": 331,
-                "description": "This is a book about financial education.",
-                "cover_image": "https://im1.book.com.tw/image/getImage?i=https://www.books.com.tw/img/001/093/54/0010935466.jpg&v=631872bdk&w=348&h=348",
-                "current_bid": 150.0,
-                "starting_bid": 100.0,
-                "bid_increment": 10.0,
-            },
-            {
-                "title": "張忠謀自傳全集",
-                "author": "張忠謀",
-                "price": 825,
-                "description": "The autobiography of Morris Chang, founder of TSMC.",
-                "cover_image": "https://im2.book.com.tw/image/getImage?i=https://www.books.com.tw/img/001/100/55/0011005571.jpg&v=672b7d6ck&w=348&h=348",
-                "current_bid": 400.0,
-                "starting_bid": 300.0,
-                "bid_increment": 50.0,
-            },
-        ]
-        for book_data in seed_books:
-            crud.create_book(db, schemas.BookCreate(**book_data), owner_id=seller.id)
-        logger.info("Database seeded successfully.")
-    else:
-        logger.info("Database already contains data.")
-    db.close()
-
-    logger.info(
-        "Starting BookSwap backend",
-        extra={"props": {"one_click_bid_enabled": ONE_CLICK_BID_ENABLED}},
-    )
-
-
 # -------------------------------
 # Middleware for trace_id & Dashboard Stats
 # -------------------------------
@@ -250,13 +202,21 @@ async def request_context_middleware(request: Request, call_next):
     start_time = datetime.datetime.utcnow().timestamp()
     trace_id = str(uuid.uuid4())
     trace_id_var.set(trace_id)
-    DASHBOARD_STATE["total_requests"] += 1
+    if STARTUP_TIMINGS["first_request_ms"] is None:
+        STARTUP_TIMINGS["first_request_ms"] = round(
+            (time.perf_counter() - IMPORT_STARTED) * 1000, 2
+        )
+        logger.info(
+            "First request received",
+            extra={"props": {"event": "first_request", **STARTUP_TIMINGS}},
+        )
+    dashboard.DASHBOARD_STATE["total_requests"] += 1
     response = await call_next(request)
     process_time = datetime.datetime.utcnow().timestamp() - start_time
     process_time_ms = round(process_time * 1000, 2)
-    DASHBOARD_STATE["latest_latency_ms"] = process_time_ms
+    dashboard.DASHBOARD_STATE["latest_latency_ms"] = process_time_ms
     if response.status_code >= 500:
-        DASHBOARD_STATE["total_errors"] += 1
+        dashboard.DASHBOARD_STATE["total_errors"] += 1
         logger.warning(
             f"Server error detected for {request.url.path} with status {response.status_code}",
             extra={
@@ -299,8 +259,47 @@ async def request_context_middleware(request: Request, call_next):
 # -------------------------------
 # Mount Prometheus /metrics
 # -------------------------------
-metrics_app = make_asgi_app()
-app.mount("/metrics", metrics_app)
+async def metrics_app(scope, receive, send):
+    await metrics.get().asgi_app(scope, receive, send)
+
+
+if metrics.ENABLED:
+    app.mount("/metrics", metrics_app)
+
+# -------------------------------
+# Health Probes
+# -------------------------------
+
+
+@app.get("/healthz", tags=["Health"])
+def healthz():
+    # Liveness: the process is up and serving requests.
+    return {"status": "ok"}
+
+
+@app.get("/readyz", tags=["Health"])
+def readyz():
+    # Readiness: the schema exists (see `manage.py init-db`) and the hot
+    # catalogue, when enabled, has finished its first load. Later reloads and a
+    # disabled catalogue do not fail readiness since reads fall back to the
+    # database meanwhile.
+    checks = {}
+    try:
+        with engine.connect() as conn:
+            for table in (models.User.__tablename__, models.Book.__tablename__):
+                conn.execute(text(f"SELECT 1 FROM {table} LIMIT 1"))
+        checks["database"] = "ok"
+    except SQLAlchemyError as e:
+        checks["database"] = str(e.__class__.__name__)
+    if HOT_CATALOG_ENABLED:
+        checks["hot_catalog"] = hot_catalog.state
+    ready = checks["database"] == "ok" and (
+        not HOT_CATALOG_ENABLED or hot_catalog.initial_load_done
+    )
+    return JSONResponse(
+        {"status": "ready" if ready else "not_ready", "checks": checks, **STARTUP_TIMINGS},
+        status_code=200 if ready else 503,
+    )
 
 # -------------------------------
 # API Endpoints
@@ -345,75 +344,54 @@ def create_book(
     return crud.create_book(db, book, current_user.id)
 
 
+# Catalogue reads are served from the hot catalogue when it is loaded, so they
+# only open a DB session on the fallback path.
 @app.get("/api/books/", response_model=List[schemas.Book], tags=["Books"])
-def read_books(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_books(db, skip=skip, limit=limit)
+def read_books(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0, le=1000)):
+    if hot_catalog.ready:
+        return hot_catalog.get_books(skip=skip, limit=limit)
+    db = SessionLocal()
+    try:
+        return crud.get_books(db, skip=skip, limit=limit)
+    finally:
+        db.close()
 
 
 @app.get("/api/books/{book_id}", response_model=schemas.Book, tags=["Books"])
-def read_book(book_id: int, db: Session = Depends(get_db)):
-    db_book = crud.get_book(db, book_id=book_id)
+def read_book(book_id: int):
+    if hot_catalog.ready:
+        db_book = hot_catalog.get_book(book_id)
+    else:
+        db = SessionLocal()
+        try:
+            db_book = crud.get_book(db, book_id=book_id)
+        finally:
+            db.close()
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
     return db_book
 
 
-# --- Original Endpoints (Preserved) ---
+@app.get("/api/catalog-stats", tags=["Books"])
+def catalog_stats():
+    usage = hot_catalog.memory_usage()
+    collectors = metrics.get()
+    if collectors:
+        collectors.CATALOG_BYTES.set(usage["bytes"])
+    return {"enabled": HOT_CATALOG_ENABLED, "state": hot_catalog.state, **usage}
 
 
-@app.get("/", tags=["Dashboard"], response_class=HTMLResponse)
-async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
-
-
-@app.get("/api/dashboard-stats", tags=["Dashboard"])
-async def dashboard_stats():
-    total = DASHBOARD_STATE["total_requests"]
-    errors = DASHBOARD_STATE["total_errors"]
-    availability = ((total - errors) / total) * 100 if total > 0 else 100.0
-    cpu = CPU_USAGE._value.get()
-    latency = DASHBOARD_STATE["latest_latency_ms"]
-    alerts = []
-    if cpu > 85:
-        alerts.append(
-            {
-                "level": "WARNING",
-                "title": f"CPU High ({cpu}%)",
-                "component": "Hosting Node",
-            }
-        )
-    if latency > 500:
-        alerts.append(
-            {"level": "CRITICAL", "title": "High Latency", "component": "API Gateway"}
-        )
-    if errors > 0 and (errors / total) > 0.05:
-        alerts.append(
-            {
-                "level": "CRITICAL",
-                "title": "Error Rate > 5%",
-                "component": "Auth/Bid Service",
-            }
-        )
-    return JSONResponse(
-        {
-            "metrics": {
-                "availability": round(availability, 2),
-                "errorBudgetUsed": min(errors * 10, 100),
-                "p95Latency": int(latency),
-                "p95Threshold": 200,
-                "cpuUsage": cpu,
-                "cpuThreshold": 90,
-            },
-            "logs": list(DASHBOARD_STATE["logs"]),
-            "alerts": alerts,
-        }
-    )
+# --- Original Endpoints (Preserved) ---
+
+app.include_router(dashboard.router)
 
 
 @app.post("/login", tags=["Authentication (Old)"])
 def login(password: str):
     if password != "correct-password":
-        LOGIN_ERRORS.labels(error_code="401_INVALID_PASSWORD").inc()
+        collectors = metrics.get()
+        if collectors:
+            collectors.LOGIN_ERRORS.labels(error_code="401_INVALID_PASSWORD").inc()
         logger.warning(
             "Failed login attempt", extra={"props": {"reason": "Invalid password"}}
         )
@@ -431,8 +409,21 @@ class BidCreate(BaseModel):
     amount: float
 
 
-@BID_LATENCY.time()
+def observe_bid_latency(func):
+    # Records into the bid latency histogram without importing metrics at load time.
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        collectors = metrics.get()
+        if not collectors:
+            return func(*args, **kwargs)
+        with collectors.BID_LATENCY.time():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
 @app.post("/bid", tags=["Bidding"])
+@observe_bid_latency
 def place_bid(bid: BidCreate, db: Session = Depends(get_db)):
     book_id = bid.book_id
     amount = bid.amount
@@ -493,10 +484,7 @@ def place_bid(bid: BidCreate, db: Session = Depends(get_db)):
     try:
         logger.info("Connecting to database to save bid...")
 
-        book.current_bid = amount
-        db.commit()
-        db.refresh(book)
-        logger.info(f"Successfully updated bid to ${amount} for book {book_id}.")
+        updated = crud.update_book_bid(db, book, current_highest, amount)
 
     except Exception as e:
         logger.error(
@@ -509,12 +497,24 @@ def place_bid(bid: BidCreate, db: Session = Depends(get_db)):
             media_type="application/json",
         )
 
+    if not updated:
+        logger.warning(f"Bid ${amount} lost a race for book {book_id}")
+        raise HTTPException(
+            status_code=409,
+            detail="The current bid changed while placing yours, please retry",
+        )
+    logger.info(f"Successfully updated bid to ${amount} for book {book_id}.")
+    crud.notify_book_changed(book)
+
     return {
         "message": f"Bid for book {book_id} of ${amount} placed successfully.",
         "current_bid": book.current_bid,
     }
 
 
+STARTUP_TIMINGS["import_ms"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 2)
+
+
 if __name__ == "__main__":
     import uvicorn
 
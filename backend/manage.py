@@ -0,0 +1,142 @@
+"""
+Explicit setup steps that used to run when the API started.
+
+Usage:
+    python manage.py init-db               # create tables and seed demo data if empty
+    python manage.py reload-catalog        # ask every worker's hot catalogue to reload
+    python manage.py prune-book-changes    # trim the book_changes log (--keep N rows)
+"""
+import argparse
+
+from sqlalchemy import func
+
+import models, schemas, crud
+from database import SessionLocal, engine
+from log_config import configure_logging, logger
+
+
+def create_schema():
+    """Creates all database tables based on the models."""
+    models.Base.metadata.create_all(bind=engine)
+    logger.info("Database schema is up to date.")
+
+
+def seed_database():
+    """Seeds the default users and books when the users table is empty."""
+    db = SessionLocal()
+    try:
+        if db.query(models.User).count() != 0:
+            logger.info("Database already contains data.")
+            return
+        logger.info("Database is empty. Seeding initial users and books...")
+        # Create default users
+        seller = crud.create_user(
+            db,
+            schemas.UserCreate(
+                username="seller",
+                email="seller@example.com",
+                password="password",
+                role="seller",
+            ),
+        )
+        crud.create_user(
+            db,
+            schemas.UserCreate(
+                username="buyer",
+                email="buyer@example.com",
+                password="password",
+                role="buyer",
+            ),
+        )
+
+        # Create default books
+        seed_books = [
+            {
+                "title": "富爸爸，窮爸爸【25週年紀念版】",
+                "author": "羅勃特．T．清崎",
+                "price": 331,
+                "description": "This is a book about financial education.",
+                "cover_image": "https://im1.book.com.tw/image/getImage?i=https://www.books.com.tw/img/001/093/54/0010935466.jpg&v=631872bdk&w=348&h=348",
+                "current_bid": 150.0,
+                "starting_bid": 100.0,
+                "bid_increment": 10.0,
+            },
+            {
+                "title": "張忠謀自傳全集",
+                "author": "張忠謀",
+                "price": 825,
+                "description": "The autobiography of Morris Chang, founder of TSMC.",
+                "cover_image": "https://im2.book.com.tw/image/getImage?i=https://www.books.com.tw/img/001/100/55/0011005571.jpg&v=672b7d6ck&w=348&h=348",
+                "current_bid": 400.0,
+                "starting_bid": 300.0,
+                "bid_increment": 50.0,
+            },
+        ]
+        for book_data in seed_books:
+            crud.create_book(db, schemas.BookCreate(**book_data), owner_id=seller.id)
+        logger.info("Database seeded successfully.")
+    finally:
+        db.close()
+
+
+def init_db(args):
+    create_schema()
+    seed_database()
+
+
+def reload_catalog(args):
+    """
+    Requests a full snapshot reload from every running hot catalogue. Workers act
+    on it at their next sync, within HOT_CATALOG_SYNC_SECONDS.
+    """
+    db = SessionLocal()
+    try:
+        crud.record_book_change(db, None)
+        db.commit()
+    finally:
+        db.close()
+    logger.info("Hot catalogue reload requested.")
+
+
+def prune_book_changes(args):
+    """
+    Deletes all but the newest --keep rows of the book_changes log. A catalogue
+    that falls behind the pruned range reloads its whole snapshot.
+    """
+    db = SessionLocal()
+    try:
+        latest = db.query(func.max(models.BookChange.id)).scalar() or 0
+        deleted = (
+            db.query(models.BookChange)
+            .filter(models.BookChange.id <= latest - max(args.keep, 1))
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+    logger.info(f"Pruned {deleted} book change rows.")
+
+
+COMMANDS = {
+    "init-db": init_db,
+    "reload-catalog": reload_catalog,
+    "prune-book-changes": prune_book_changes,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BookSwap backend management")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=10000,
+        help="rows kept by prune-book-changes (at least 1)",
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+    COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
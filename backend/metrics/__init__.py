@@ -0,0 +1,15 @@
+import os
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+
+def get():
+    """
+    Returns the metrics.collectors module, importing it on first use, or None
+    when METRICS_ENABLED is off. Callers skip recording when it returns None.
+    """
+    if not ENABLED:
+        return None
+    from metrics import collectors
+
+    return collectors
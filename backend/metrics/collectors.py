@@ -0,0 +1,25 @@
+# Prometheus collectors and the CPU sampler. Only imported through metrics.get(),
+# so prometheus_client and psutil stay off the import path.
+import psutil
+from prometheus_client import Histogram, Counter, Gauge, make_asgi_app
+
+BID_LATENCY = Histogram(
+    "bookswap_bid_latency_seconds", "Latency of the bid flow in seconds"
+)
+LOGIN_ERRORS = Counter(
+    "bookswap_login_errors_total", "Total number of login errors", ["error_code"]
+)
+CPU_USAGE = Gauge(
+    "bookswap_cpu_usage_percent", "Current CPU usage of the application host"
+)
+CATALOG_BYTES = Gauge(
+    "bookswap_catalog_bytes", "Approximate memory held by the hot book catalogue"
+)
+
+# ASGI app serving /metrics
+asgi_app = make_asgi_app()
+
+
+def update_cpu_usage():
+    while True:
+        CPU_USAGE.set(psutil.cpu_percent(interval=1))
@@ -28,3 +28,16 @@ class Book(Base):
 
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="books")
+
+class BookChange(Base):
+    """
+    Append-only log of committed book writes, one row per create or bid.
+    Hot catalogues in every worker poll it to pick up each other's changes.
+    A row with book_id NULL asks every catalogue for a full reload.
+    """
+    __tablename__ = "book_changes"
+    # Keeps ids increasing even after old rows are pruned.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, nullable=True)
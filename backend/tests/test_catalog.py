@@ -0,0 +1,191 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import catalog, crud, models, schemas
+from catalog import CatalogueFull, HotCatalogue
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    models.Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def seller(db):
+    return crud.create_user(
+        db,
+        schemas.UserCreate(
+            username="seller", email="seller@example.com", password="pw", role="seller"
+        ),
+    )
+
+
+def add_book(db, seller, **fields):
+    data = {"title": "Book", "author": "Author", "price": 100.0, **fields}
+    return crud.create_book(db, schemas.BookCreate(**data), owner_id=seller.id)
+
+
+def as_dict(book):
+    return {name: getattr(book, name) for name in catalog.BOOK_COLUMNS}
+
+
+def test_reads_match_crud(engine, db, seller):
+    for i in range(5):
+        add_book(db, seller, title=f"Book {i}", current_bid=float(i))
+    hot = HotCatalogue()
+    hot.load_snapshot(engine)
+
+    assert as_dict(hot.get_book(3)) == as_dict(crud.get_book(db, 3))
+    assert hot.get_book(99) is None and crud.get_book(db, 99) is None
+    for skip, limit in [(0, 100), (1, 2), (4, 10), (10, 5), (0, 0)]:
+        assert [as_dict(b) for b in hot.get_books(skip, limit)] == [
+            as_dict(b) for b in crud.get_books(db, skip, limit)
+        ]
+
+
+def test_null_columns_round_trip_to_none(engine, db, seller):
+    book = add_book(db, seller, price=None)
+    # Column defaults fill these on insert, so clear them afterwards.
+    for name in ("current_bid", "starting_bid", "bid_increment", "owner_id"):
+        setattr(book, name, None)
+    db.commit()
+    hot = HotCatalogue()
+    hot.load_snapshot(engine)
+
+    record = hot.get_book(book.id)
+    assert as_dict(record) == as_dict(crud.get_book(db, book.id))
+    assert record.price is None and record.current_bid is None
+    assert record.bid_increment is None and record.owner_id is None
+
+
+def test_snapshot_over_limit_disables(engine, db, seller):
+    for _ in range(3):
+        add_book(db, seller)
+    hot = HotCatalogue(max_books=2)
+
+    with pytest.raises(CatalogueFull):
+        hot.load_snapshot(engine)
+    assert hot.state == catalog.DISABLED
+    assert hot.initial_load_done
+
+
+def test_insert_over_limit_disables(engine, db, seller):
+    add_book(db, seller)
+    hot = HotCatalogue(max_books=1)
+    hot.load_snapshot(engine)
+    assert hot.ready
+
+    with pytest.raises(CatalogueFull):
+        hot.upsert(add_book(db, seller))
+    assert hot.state == catalog.DISABLED
+
+
+class WritesAfterRead:
+    """Engine stand-in that runs `on_read` once the snapshot rows were fetched."""
+
+    def __init__(self, engine, on_read):
+        self.engine = engine
+        self.on_read = on_read
+
+    @contextmanager
+    def connect(self):
+        with self.engine.connect() as conn:
+            yield conn
+        self.on_read()
+
+
+def test_upserts_during_load_are_replayed(engine, db, seller):
+    book = add_book(db, seller, current_bid=10.0)
+    hot = HotCatalogue()
+    late = {}
+
+    def write():
+        crud.update_book_bid(db, book, 10.0, 20.0)
+        hot.upsert(book)
+        late["book"] = add_book(db, seller, title="Late")
+        hot.upsert(late["book"])
+
+    hot.load_snapshot(WritesAfterRead(engine, write))
+
+    assert hot.get_book(book.id).current_bid == 20.0
+    assert hot.get_book(late["book"].id).title == "Late"
+    assert len(hot) == 2
+
+
+def test_lower_bid_is_ignored(engine, db, seller):
+    book = add_book(db, seller, current_bid=150.0)
+    hot = HotCatalogue()
+    hot.load_snapshot(engine)
+
+    assert crud.update_book_bid(db, book, 150.0, 200.0)
+    hot.upsert(book)
+    stale = schemas.Book.model_validate(book).model_copy(update={"current_bid": 180.0})
+    hot.upsert(stale)
+    assert hot.get_book(book.id).current_bid == 200.0
+
+
+def test_conditional_bid_update_rejects_stale_expectation(db, seller):
+    book = add_book(db, seller, current_bid=150.0)
+    assert crud.update_book_bid(db, book, 150.0, 200.0)
+    assert not crud.update_book_bid(db, book, 150.0, 180.0)
+    assert crud.get_book(db, book.id).current_bid == 200.0
+
+
+def test_sync_changes_picks_up_other_writers(engine, db, seller):
+    book = add_book(db, seller, current_bid=10.0)
+    hot = HotCatalogue()
+    hot.load_snapshot(engine)
+
+    # Writes from "another worker": committed and logged, but not upserted here.
+    crud.update_book_bid(db, book, 10.0, 30.0)
+    new_book = add_book(db, seller, title="Elsewhere")
+    assert hot.get_book(new_book.id) is None
+
+    assert hot.sync_changes(engine) == 2
+    assert hot.get_book(book.id).current_bid == 30.0
+    assert hot.get_book(new_book.id).title == "Elsewhere"
+    assert hot.sync_changes(engine) == 0
+
+
+def test_sync_changes_reloads_on_request(engine, db, seller):
+    add_book(db, seller)
+    hot = HotCatalogue()
+    hot.load_snapshot(engine)
+
+    crud.record_book_change(db, None)
+    db.commit()
+    assert hot.sync_changes(engine) == 1
+    assert hot.ready
+
+
+def test_sync_changes_reloads_when_log_pruned_past_position(engine, db, seller):
+    add_book(db, seller)
+    hot = HotCatalogue()
+    hot.load_snapshot(engine)
+
+    add_book(db, seller)
+    add_book(db, seller)
+    # Prune everything but the newest entry, as prune-book-changes --keep 1 would.
+    latest = db.query(models.BookChange).order_by(models.BookChange.id.desc()).first()
+    db.query(models.BookChange).filter(models.BookChange.id < latest.id).delete()
+    db.commit()
+
+    assert hot.sync_changes(engine) == 3
+    assert len(hot) == 3
@@ -0,0 +1,43 @@
+import logging
+
+import pytest
+
+import log_config
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+@pytest.fixture(autouse=True)
+def fresh_logger(monkeypatch):
+    monkeypatch.setattr(log_config, "_formatter", None)
+    handlers = list(log_config.logger.handlers)
+    log_config.logger.handlers.clear()
+    yield
+    log_config.logger.handlers[:] = handlers
+
+
+def test_extra_handler_attached_after_earlier_call():
+    # e.g. a manage.py command configured logging before the app started.
+    log_config.configure_logging()
+    handler = RecordingHandler()
+    log_config.configure_logging(handler)
+
+    assert handler in log_config.logger.handlers
+    log_config.logger.info("hello")
+    assert '"message": "hello"' in handler.messages[0]
+
+
+def test_repeat_calls_do_not_duplicate_handlers():
+    log_config.configure_logging(RecordingHandler())
+    log_config.configure_logging(RecordingHandler())
+
+    types = [type(h) for h in log_config.logger.handlers]
+    assert types.count(logging.StreamHandler) == 1
+    assert types.count(RecordingHandler) == 1